@@ -1,22 +1,100 @@
 import asyncio
+import httpx
+import math
+import orjson
 import structlog
 from abc import ABC, abstractmethod
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
-from influxdb_client.client.write.point import Point
+from logutil import DEBUG_ON
+from writer import WriteBuffer
 
 log = structlog.get_logger()
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_MEASUREMENT_ESCAPE = str.maketrans({",": "\\,", " ": "\\ "})
+_TAG_ESCAPE = str.maketrans({",": "\\,", "=": "\\=", " ": "\\ "})
+_STRING_FIELD_ESCAPE = str.maketrans({'"': '\\"', "\\": "\\\\"})
+
+
+def _field_value(value) -> str | None:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        return repr(value).removesuffix(".0")
+    return '"' + str(value).translate(_STRING_FIELD_ESCAPE) + '"'
+
+
+def _load_json(resp: httpx.Response):
+    """Decode a JSON response body with orjson, falling back to httpx for odd encodings."""
+    try:
+        return orjson.loads(resp.content)
+    except orjson.JSONDecodeError:
+        return resp.json()
+
+
+def _tag_str(tags: dict) -> str:
+    """
+    Render tags as ",key=value..." sorted by key, as Point does and InfluxDB prefers for ingest.
+
+    Like Point, None and empty keys/values are skipped: "level=None" would be
+    a bogus series and "level=" is invalid line protocol that fails the whole write.
+    """
+    parts = []
+    for key, value in sorted(tags.items()):
+        if value is None:
+            continue
+        key = key.translate(_TAG_ESCAPE)
+        value = str(value).translate(_TAG_ESCAPE)
+        if key and value:
+            parts.append(f",{key}={value}")
+    return "".join(parts)
+
+
+def _fast_point(measurement: str, tags: dict | str, fields: dict, time: datetime | int) -> str:
+    """
+    Build one InfluxDB line-protocol record.
+
+    Cheaper than the fluent Point builder for collectors that emit many rows.
+    `time` is either an aware datetime or an integer timestamp in nanoseconds.
+    `tags` is either a dict or an already rendered ",key=value..." string (see _tag_str).
+    None and non-finite field values are dropped, like Point does.
+    """
+    line = measurement.translate(_MEASUREMENT_ESCAPE) + (tags if isinstance(tags, str) else _tag_str(tags))
+    field_str = ",".join(
+        f"{key.translate(_TAG_ESCAPE)}={formatted}"
+        for key, value in fields.items()
+        if value is not None and (formatted := _field_value(value)) is not None
+    )
+    if isinstance(time, datetime):
+        time = (time - _EPOCH) // _MICROSECOND * 1000
+    return f"{line} {field_str} {time}"
+
 
 class BaseCollector(ABC):
     """Base class for all data collectors."""
 
     name: str = "base"
     interval_sec: int = 60
+    http_timeout: float = 10.0
 
-    def __init__(self, settings, influx_client: InfluxDBClientAsync):
+    def __init__(self, settings, influx_client: InfluxDBClientAsync, write_buffer: WriteBuffer,
+                 http_client: httpx.AsyncClient):
         self.settings = settings
         self.influx = influx_client
+        self._buffer = write_buffer
+        self._client = http_client  # shared across collectors, owned by main()
+        # A bare float would replace the shared client's whole Timeout,
+        # including its short connect timeout
+        self._timeout = httpx.Timeout(self.http_timeout, connect=3.0)
+        # Rendered tag sets keyed by extra_tags; collectors only emit a handful
+        # (site, period, price level), so this stays tiny.
+        self._tag_cache: dict[tuple, str] = {}
         self._consecutive_errors = 0
         self._max_backoff = 300  # 5 min max backoff
 
@@ -42,26 +120,35 @@ class BaseCollector(ABC):
                 )
                 await asyncio.sleep(backoff)
                 continue
-            await asyncio.sleep(self.interval_sec)
+            await asyncio.sleep(self._next_delay())
+
+    def _next_delay(self) -> float:
+        """Seconds to sleep after a successful collection. Override for non-periodic schedules."""
+        return self.interval_sec
 
     @abstractmethod
     async def _collect(self):
         """Override: fetch data and call self._write_points()."""
         ...
 
-    async def _write_points(self, points: list[Point], bucket: str):
-        """Write a batch of InfluxDB points."""
+    def _make_point(self, measurement: str, extra_tags: dict, fields: dict, time: datetime | int) -> str:
+        """Line-protocol record tagged source=<collector name> plus `extra_tags`."""
+        key = tuple(extra_tags.items())
+        tags = self._tag_cache.get(key)
+        if tags is None:
+            # source is merged in rather than prefixed, so all keys stay sorted
+            tags = self._tag_cache[key] = _tag_str({**extra_tags, "source": self.name})
+        return _fast_point(measurement, tags, fields, time)
+
+    async def _write_points(self, points: list[str], bucket: str):
+        """Queue a batch of line-protocol records on the shared write buffer."""
         if not points:
             return
-        write_api = self.influx.write_api()
-        await write_api.write(
-            bucket=bucket,
-            org=self.settings.influx.org,
-            record=points,
-        )
-        log.info(
-            "collector.write",
-            collector=self.name,
-            bucket=bucket,
-            points=len(points),
-        )
+        await self._buffer.put((bucket, points))
+        if DEBUG_ON:
+            log.debug(
+                "collector.write",
+                collector=self.name,
+                bucket=bucket,
+                points=len(points),
+            )
@@ -1,14 +1,27 @@
-import httpx
+import asyncio
+import calendar
 import structlog
+import time
 from datetime import datetime, timezone, timedelta
-from influxdb_client.client.write.point import Point
-from .base import BaseCollector
+from logutil import DEBUG_ON
+from .base import BaseCollector, _load_json
 
 log = structlog.get_logger()
 
 SOLCAST_BASE_URL = "https://api.solcast.com.au"
 
 
+PERIOD_NS = 30 * 60 * 1_000_000_000  # forecasts come in 30-min periods
+
+
+def _parse_solcast_ts_ns(s: str) -> int:
+    """Parse Solcast's fixed `YYYY-MM-DDTHH:MM:SS.fffffffZ` layout (always UTC) to epoch ns."""
+    return calendar.timegm((
+        int(s[0:4]), int(s[5:7]), int(s[8:10]),
+        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+    )) * 1_000_000_000
+
+
 class SolcastCollector(BaseCollector):
     """
     Collects PV production forecast from Solcast API.
@@ -27,29 +40,38 @@ class SolcastCollector(BaseCollector):
     """
 
     name = "solcast"
-    interval_sec = 900  # Check every 15 min, but only fetch at scheduled hours
+    interval_sec = 900  # Retry cadence while a scheduled hour hasn't been fetched yet
+    http_timeout = 30.0
 
     # Hours (UTC) at which we actually call the API
     FETCH_HOURS_UTC = {5, 9, 13, 17, 21}
 
-    def __init__(self, settings, influx_client):
-        super().__init__(settings, influx_client)
+    def __init__(self, settings, influx_client, write_buffer, http_client):
+        super().__init__(settings, influx_client, write_buffer, http_client)
         self._api_key = settings.solcast.api_key
         self._sites = {
             "se": settings.solcast.site_1,
             "sw": settings.solcast.site_2,
         }
-        self._client = httpx.AsyncClient(timeout=30.0)
+        self._site_urls = {
+            label: f"{SOLCAST_BASE_URL}/rooftop_sites/{site_id}/forecasts"
+            for label, site_id in self._sites.items()
+        }
+        self._auth_header = {"Authorization": f"Bearer {self._api_key}"}
+        self._fetch_params = {"format": "json", "hours": 48}
         self._last_fetch_hour: int | None = None
         self._daily_calls = 0
-        self._daily_calls_date: str = ""
+        self._daily_calls_day = -1  # days since the Unix epoch (UTC)
 
     def _reset_daily_counter_if_needed(self):
-        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        if today != self._daily_calls_date:
+        day = int(time.time() // 86400)
+        if day != self._daily_calls_day:
             self._daily_calls = 0
-            self._daily_calls_date = today
-            log.info("solcast.daily_counter_reset", date=today)
+            self._daily_calls_day = day
+            log.info(
+                "solcast.daily_counter_reset",
+                date=datetime.fromtimestamp(day * 86400, timezone.utc).strftime("%Y-%m-%d"),
+            )
 
     def _should_fetch(self) -> bool:
         """Only fetch at scheduled hours, max once per hour window."""
@@ -69,62 +91,98 @@ class SolcastCollector(BaseCollector):
 
         return True
 
+    def _next_delay(self) -> float:
+        """Sleep until the next scheduled fetch hour instead of polling every 15 min."""
+        now = datetime.now(timezone.utc)
+        if now.hour in self.FETCH_HOURS_UTC and self._last_fetch_hour != now.hour:
+            # Still inside a scheduled hour without a successful fetch → retry
+            return self.interval_sec
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        for offset in range(1, 25):
+            candidate = hour_start + timedelta(hours=offset)
+            if candidate.hour in self.FETCH_HOURS_UTC:
+                return (candidate - now).total_seconds()
+        return self.interval_sec
+
     async def _collect(self):
         if not self._should_fetch():
-            log.debug("solcast.skip", reason="not_scheduled_hour")
+            if DEBUG_ON:
+                log.debug("solcast.skip", reason="not_scheduled_hour")
             return
 
         now = datetime.now(timezone.utc)
         points = []
 
-        for site_label, site_id in self._sites.items():
-            try:
-                site_points = await self._fetch_site(site_id, site_label)
-                points.extend(site_points)
-                self._daily_calls += 1
-                log.info(
-                    "solcast.site_fetched",
-                    site=site_label,
-                    site_id=site_id,
-                    forecasts=len(site_points),
-                    daily_calls=self._daily_calls,
-                )
-            except Exception:
-                log.exception("solcast.site_error", site=site_label)
-                # Don't re-raise — try the other site
+        # Both sites are independent HTTPS calls — fetch them concurrently,
+        # but never schedule more calls than the daily budget has left.
+        budget = max(0, 10 - self._daily_calls)
+        sites = list(self._sites.items())[:budget]
+        results = await asyncio.gather(
+            *(self._fetch_site(site_label) for site_label, _ in sites),
+            return_exceptions=True,
+        )
+        for (site_label, site_id), result in zip(sites, results):
+            if isinstance(result, BaseException):
+                # Don't re-raise — keep the other site's forecasts
+                log.error("solcast.site_error", site=site_label, error=repr(result))
                 continue
+            points.extend(result)
+            self._daily_calls += 1
+            log.info(
+                "solcast.site_fetched",
+                site=site_label,
+                site_id=site_id,
+                forecasts=len(result),
+                daily_calls=self._daily_calls,
+            )
 
         if points:
             await self._write_points(points, bucket="energy")
             self._last_fetch_hour = now.hour
 
-    async def _fetch_site(self, site_id: str, site_label: str) -> list[Point]:
+    async def _fetch_site(self, site_label: str) -> list[str]:
         """Fetch forecast for a single rooftop site."""
         resp = await self._client.get(
-            f"{SOLCAST_BASE_URL}/rooftop_sites/{site_id}/forecasts",
-            params={"format": "json", "hours": 48},
-            headers={"Authorization": f"Bearer {self._api_key}"},
+            self._site_urls[site_label],
+            params=self._fetch_params,
+            headers=self._auth_header,
+            timeout=self._timeout,
         )
         resp.raise_for_status()
-        data = resp.json()
+        data = _load_json(resp)
 
+        forecasts = data.get("forecasts") or []
         points = []
-        for fc in data.get("forecasts", []):
-            period_end = datetime.fromisoformat(fc["period_end"].replace("Z", "+00:00"))
-
-            # Solcast returns kW, convert to W
-            pv_estimate = fc.get("pv_estimate", 0) * 1000
-            pv_estimate10 = fc.get("pv_estimate10", 0) * 1000
-            pv_estimate90 = fc.get("pv_estimate90", 0) * 1000
-
-            points.append(
-                Point("pv_forecast")
-                .tag("source", "solcast")
-                .tag("site", site_label)
-                .field("pv_estimate_w", float(pv_estimate))
-                .field("pv_estimate10_w", float(pv_estimate10))
-                .field("pv_estimate90_w", float(pv_estimate90))
-                .time(period_end)
+        points_append = points.append
+        tags = {"site": site_label}
+
+        # period_end advances in fixed 30-min steps: parse the first one and
+        # derive the rest, unless the first/second/last rows disagree.
+        evenly_spaced = False
+        if forecasts:
+            first_ns = _parse_solcast_ts_ns(forecasts[0]["period_end"])
+            last = len(forecasts) - 1
+            evenly_spaced = (
+                _parse_solcast_ts_ns(forecasts[min(1, last)]["period_end"]) == first_ns + min(1, last) * PERIOD_NS
+                and _parse_solcast_ts_ns(forecasts[last]["period_end"]) == first_ns + last * PERIOD_NS
+            )
+            if not evenly_spaced:
+                log.warning("solcast.irregular_periods", site=site_label, forecasts=len(forecasts))
+
+        for i, fc in enumerate(forecasts):
+            get = fc.get
+            # Solcast returns kW, convert to W (multiplying by 1000.0 already yields floats)
+            points_append(
+                self._make_point(
+                    "pv_forecast",
+                    tags,
+                    {
+                        "pv_estimate_w": get("pv_estimate", 0) * 1000.0,
+                        "pv_estimate10_w": get("pv_estimate10", 0) * 1000.0,
+                        "pv_estimate90_w": get("pv_estimate90", 0) * 1000.0,
+                    },
+                    first_ns + i * PERIOD_NS if evenly_spaced else _parse_solcast_ts_ns(fc["period_end"]),
+                )
             )
 
         return points
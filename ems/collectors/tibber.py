@@ -1,13 +1,47 @@
-import httpx
+import hashlib
+import time
+import numpy as np
 import structlog
-from datetime import datetime, timezone
-from influxdb_client.client.write.point import Point
-from .base import BaseCollector
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterator
+from price_cache import PriceCache
+from .base import BaseCollector, _load_json
+
+try:
+    import xxhash
+except ImportError:  # fall back to hashlib.blake2b
+    xxhash = None
 
 log = structlog.get_logger()
 
 TIBBER_API_URL = "https://api.tibber.com/v1-beta/gql"
 
+
+@lru_cache(maxsize=8)
+def _utc_offset(suffix: str) -> timezone:
+    """Map an ISO offset suffix (`Z`, `+01:00`, `-05:30`) to a timezone."""
+    if suffix.endswith("Z"):
+        return timezone.utc
+    sign = -1 if suffix[0] == "-" else 1
+    return timezone(sign * timedelta(hours=int(suffix[1:3]), minutes=int(suffix[4:6])))
+
+
+def _payload_digest(content: bytes) -> int:
+    """Cheap 64-bit fingerprint of a raw response body."""
+    if xxhash is not None:
+        return xxhash.xxh64_intdigest(content)
+    return int.from_bytes(hashlib.blake2b(content, digest_size=8).digest(), "little")
+
+
+def _parse_tibber_ts(s: str) -> datetime:
+    """Parse Tibber's `YYYY-MM-DDTHH:MM:SS.fff+HH:MM` startsAt layout."""
+    return datetime(
+        int(s[0:4]), int(s[5:7]), int(s[8:10]),
+        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+        tzinfo=_utc_offset(s[-6:]),
+    )
+
 # GraphQL query for price info (current + today + tomorrow)
 PRICE_QUERY = """
 {
@@ -63,25 +97,54 @@ class TibberCollector(BaseCollector):
 
     name = "tibber"
     interval_sec = 300  # 5 min
+    http_timeout = 15.0
 
-    def __init__(self, settings, influx_client):
-        super().__init__(settings, influx_client)
+    def __init__(self, settings, influx_client, write_buffer, http_client, cache: PriceCache | None = None):
+        super().__init__(settings, influx_client, write_buffer, http_client)
+        self._cache = cache
         self._token = settings.tibber.token
         self._headers = {
             "Authorization": f"Bearer {self._token}",
             "Content-Type": "application/json",
         }
-        self._client = httpx.AsyncClient(timeout=15.0)
         self._last_forecast_hash = None
+        self._last_payload_hash: int | None = None
+        self._current_written_hour: int | None = None
+
+    def _forecast_lines(self, prices: list[dict], period_name: str) -> Iterator[str]:
+        """Lazily render one forecast period as line-protocol records."""
+        for p in prices:
+            yield self._make_point(
+                "electricity_price_forecast",
+                {"period": period_name, "level": p.get("level", "NORMAL")},
+                {
+                    "total": float(p["total"]),
+                    "energy": float(p["energy"]),
+                    "tax": float(p["tax"]),
+                },
+                _parse_tibber_ts(p["startsAt"]),
+            )
 
     async def _collect(self):
         resp = await self._client.post(
             TIBBER_API_URL,
             headers=self._headers,
+            timeout=self._timeout,
             json={"query": PRICE_QUERY},
         )
         resp.raise_for_status()
-        result = resp.json()
+
+        # Prices only change a few times per day: if the body is byte-identical
+        # and the current price was already written this hour, skip parsing.
+        payload_hash = _payload_digest(resp.content)
+        hour = int(time.time() // 3600)
+        if payload_hash == self._last_payload_hash and hour == self._current_written_hour:
+            log.debug("tibber.unchanged")
+            if self._cache is not None:
+                self._cache.touch()
+            return
+
+        result = _load_json(resp)
 
         if "errors" in result:
             raise RuntimeError(f"Tibber GraphQL errors: {result['errors']}")
@@ -93,18 +156,28 @@ class TibberCollector(BaseCollector):
         price_info = homes[0]["currentSubscription"]["priceInfo"]
         points = []
 
+        if self._cache is not None:
+            today = price_info.get("today") or []
+            self._cache.update(
+                float(price_info["current"]["total"]) if price_info["current"] else None,
+                np.fromiter((float(p["total"]) for p in today), dtype=np.float64, count=len(today)),
+            )
+
         # 1. Current price → write with current timestamp
         current = price_info["current"]
         if current:
             now = datetime.now(timezone.utc)
             points.append(
-                Point("electricity_price")
-                .tag("source", "tibber")
-                .tag("level", current.get("level", "NORMAL"))
-                .field("total", float(current["total"]))
-                .field("energy", float(current["energy"]))
-                .field("tax", float(current["tax"]))
-                .time(now)
+                self._make_point(
+                    "electricity_price",
+                    {"level": current.get("level", "NORMAL")},
+                    {
+                        "total": float(current["total"]),
+                        "energy": float(current["energy"]),
+                        "tax": float(current["tax"]),
+                    },
+                    now,
+                )
             )
             log.info(
                 "tibber.current_price",
@@ -114,25 +187,6 @@ class TibberCollector(BaseCollector):
 
         # 2. Forecast prices (today + tomorrow) → write with startsAt timestamp
         #    Only rewrite if forecast data changed (avoid duplicate writes)
-        forecast_points = []
-        for period_name, prices in [("today", price_info.get("today", [])),
-                                      ("tomorrow", price_info.get("tomorrow", []))]:
-            if not prices:
-                continue
-            for p in prices:
-                ts = datetime.fromisoformat(p["startsAt"])
-                forecast_points.append(
-                    Point("electricity_price_forecast")
-                    .tag("source", "tibber")
-                    .tag("period", period_name)
-                    .tag("level", p.get("level", "NORMAL"))
-                    .field("total", float(p["total"]))
-                    .field("energy", float(p["energy"]))
-                    .field("tax", float(p["tax"]))
-                    .time(ts)
-                )
-
-        # Simple dedup: hash of forecast totals
         forecast_hash = hash(
             tuple(
                 (p["total"], p["startsAt"])
@@ -141,7 +195,8 @@ class TibberCollector(BaseCollector):
             )
         )
         if forecast_hash != self._last_forecast_hash:
-            points.extend(forecast_points)
+            points.extend(self._forecast_lines(price_info.get("today") or [], "today"))
+            points.extend(self._forecast_lines(price_info.get("tomorrow") or [], "tomorrow"))
             self._last_forecast_hash = forecast_hash
             log.info(
                 "tibber.forecast_updated",
@@ -150,3 +205,6 @@ class TibberCollector(BaseCollector):
             )
 
         await self._write_points(points, bucket="energy")
+        self._last_payload_hash = payload_hash
+        if current:
+            self._current_written_hour = hour
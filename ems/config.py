@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -9,6 +10,11 @@ class InfluxConfig(BaseSettings):
     token: str
     org: str = "ems"
     bucket: str = "energy"
+    write_batch_size: int = 5000
+    write_flush_interval_ms: int = 2000
+    write_jitter_interval_ms: int = 500
+    write_retry_interval_ms: int = 5000
+    write_max_retries: int = 3
 
 class TibberConfig(BaseSettings):
     model_config = {"env_prefix": "TIBBER_"}
@@ -39,7 +45,9 @@ class Settings(BaseSettings):
     sonnen: SonnenConfig = Field(default_factory=SonnenConfig)
     ems: EMSConfig = Field(default_factory=EMSConfig)
 
-def load_settings() -> Settings:
+@lru_cache(maxsize=1)
+def _load_env_settings() -> Settings:
+    """Build Settings from the environment once."""
     env_aliases = {
         "INFLUXDB_URL": "INFLUX_URL",
         "INFLUXDB_TOKEN": "INFLUX_TOKEN",
@@ -62,3 +70,19 @@ def load_settings() -> Settings:
         os.environ.setdefault(key, value)
 
     return Settings()
+
+def load_settings(overrides: dict[str, dict] | None = None) -> Settings:
+    """
+    Return the cached Settings, optionally with per-section overrides such as
+    {"ems": {"dry_run": True}}. Overrides produce a copy, so the cached
+    instance is never mutated. Use load_settings.cache_clear() to re-read env.
+    """
+    settings = _load_env_settings()
+    if not overrides:
+        return settings
+    return settings.model_copy(update={
+        section: getattr(settings, section).model_copy(update=values)
+        for section, values in overrides.items()
+    })
+
+load_settings.cache_clear = _load_env_settings.cache_clear
@@ -0,0 +1,8 @@
+import logging
+import os
+
+# Resolved once at import so hot paths can skip building log kwargs entirely
+log_level = os.getenv("EMS_LOG_LEVEL", "INFO").upper()
+_LEVELS = logging.getLevelNamesMapping()
+LEVEL = _LEVELS.get(log_level, logging.INFO)
+DEBUG_ON = LEVEL <= logging.DEBUG
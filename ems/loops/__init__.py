@@ -1,4 +1,5 @@
 from .decision import DecisionLoop
 from .actuation import ActuationLoop
 from .confirm import ConfirmLoop
-__all__ = ["DecisionLoop", "ActuationLoop", "ConfirmLoop"]
+from .periodic import periodic
+__all__ = ["DecisionLoop", "ActuationLoop", "ConfirmLoop", "periodic"]
@@ -4,6 +4,9 @@ import structlog
 log = structlog.get_logger()
 
 class ActuationLoop:
+    # Safety re-check interval in case a change notification is ever missed
+    WAKE_TIMEOUT_SEC = 60
+
     def __init__(self, settings, influx_client, decision_loop):
         self.settings = settings
         self.influx = influx_client
@@ -18,7 +21,11 @@ class ActuationLoop:
                 await self._tick()
             except Exception:
                 log.exception("actuation_loop.error")
-            await asyncio.sleep(10)
+            try:
+                await asyncio.wait_for(self.decision_loop._change_event.wait(), timeout=self.WAKE_TIMEOUT_SEC)
+            except asyncio.TimeoutError:
+                pass
+            self.decision_loop._change_event.clear()
 
     async def _tick(self):
         decision = self.decision_loop.current_decision
@@ -1,6 +1,6 @@
-import asyncio
 import structlog
 from datetime import datetime, timezone
+from .periodic import periodic
 
 log = structlog.get_logger()
 
@@ -13,12 +13,14 @@ class ConfirmLoop:
 
     async def run_forever(self):
         log.info("confirm_loop.start", interval=self.interval)
-        while True:
-            try:
-                await self._tick()
-            except Exception:
-                log.exception("confirm_loop.error")
-            await asyncio.sleep(self.interval)
+        await periodic(self.interval, self.tick)
+
+    async def tick(self):
+        """One iteration; errors are logged so a shared scheduler keeps running."""
+        try:
+            await self._tick()
+        except Exception:
+            log.exception("confirm_loop.error")
 
     async def _tick(self):
         now = datetime.now(timezone.utc)
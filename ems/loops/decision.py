@@ -1,7 +1,10 @@
 import asyncio
+import numpy as np
 import structlog
 from datetime import datetime, timezone
 from typing import Literal, Optional, TypedDict
+from price_cache import PriceCache
+from .periodic import periodic
 
 log = structlog.get_logger()
 
@@ -13,9 +16,14 @@ class DecisionResult(TypedDict):
 
 
 class DecisionLoop:
-    def __init__(self, settings, influx_client):
+    # Prices older than this in the shared cache are re-read from InfluxDB
+    CACHE_MAX_AGE_SEC = 600
+
+    def __init__(self, settings, influx_client, cache: PriceCache | None = None):
         self.settings = settings
         self.influx = influx_client
+        self._cache = cache
+        self._query_api = influx_client.query_api()
         self.interval = settings.ems.decision_interval_sec
         self._bucket = settings.influx.bucket
         self._org = settings.influx.org
@@ -24,6 +32,8 @@ class DecisionLoop:
             "target_w": 0,
             "reason": "initial state",
         }
+        # Set whenever the decided mode changes; ActuationLoop waits on it
+        self._change_event = asyncio.Event()
 
     @property
     def current_result(self) -> DecisionResult:
@@ -35,18 +45,22 @@ class DecisionLoop:
 
     async def run_forever(self):
         log.info("decision_loop.start", interval=self.interval)
-        while True:
-            try:
-                await self._tick()
-            except Exception:
-                log.exception("decision_loop.error")
-            await asyncio.sleep(self.interval)
+        await periodic(self.interval, self.tick)
+
+    async def tick(self):
+        """One iteration; errors are logged so a shared scheduler keeps running."""
+        try:
+            await self._tick()
+        except Exception:
+            log.exception("decision_loop.error")
 
     async def _tick(self):
         now = datetime.now(timezone.utc)
         log.info("decision_loop.tick", ts=now.isoformat())
-        current_price = await self._fetch_current_price_ct()
-        today_prices = await self._fetch_today_forecast_ct()
+        if self._cache is not None and self._cache.is_fresh(self.CACHE_MAX_AGE_SEC):
+            current_price, today_prices = self._cache.current, self._cache.today
+        else:
+            current_price, today_prices = await self._fetch_prices_ct()
 
         if current_price is None:
             result: DecisionResult = {
@@ -54,15 +68,15 @@ class DecisionLoop:
                 "target_w": 0,
                 "reason": "missing current price",
             }
-        elif not today_prices:
+        elif today_prices.size == 0:
             result = {
                 "mode": "HOLD",
                 "target_w": 0,
                 "reason": "missing today forecast",
             }
         else:
-            p25 = self._percentile(today_prices, 0.25)
-            p75 = self._percentile(today_prices, 0.75)
+            # np.quantile selects both order statistics with a partial sort (O(N))
+            p25, p75 = np.quantile(today_prices, [0.25, 0.75]).tolist()
             spread = p75 - p25
 
             if current_price <= p25 and spread >= 8.0:
@@ -84,6 +98,8 @@ class DecisionLoop:
                     "reason": f"price={current_price:.2f}, P25={p25:.2f}, P75={p75:.2f}, spread={spread:.2f}ct",
                 }
 
+        if result["mode"] != self._current_result["mode"]:
+            self._change_event.set()
         self._current_result = result
         log.info(
             "decision_loop.result",
@@ -92,49 +108,53 @@ class DecisionLoop:
             reason=result["reason"],
         )
 
-    async def _fetch_current_price_ct(self) -> Optional[float]:
+    async def _fetch_prices_ct(self) -> tuple[Optional[float], np.ndarray]:
+        """Current price and today's forecast prices, in one Flux round-trip."""
         query = f'''
 from(bucket: "{self._bucket}")
   |> range(start: -6h)
   |> filter(fn: (r) => r._measurement == "electricity_price")
   |> filter(fn: (r) => r._field == "total")
   |> last()
-'''
-        tables = await self.influx.query_api().query(query=query, org=self._org)
-        for table in tables:
-            for record in table.records:
-                value = record.get_value()
-                if value is not None:
-                    return float(value)
-        return None
+  |> yield(name: "current")
 
-    async def _fetch_today_forecast_ct(self) -> list[float]:
-        query = f'''
 from(bucket: "{self._bucket}")
   |> range(start: -36h, stop: 36h)
   |> filter(fn: (r) => r._measurement == "electricity_price_forecast")
   |> filter(fn: (r) => r._field == "total")
   |> filter(fn: (r) => r.period == "today")
+  |> yield(name: "forecast")
 '''
-        tables = await self.influx.query_api().query(query=query, org=self._org)
-        prices_by_time: dict[datetime, float] = {}
+        tables = await self._query_api.query(query=query, org=self._org)
+        current_price: Optional[float] = None
+        forecast_tables = []
         for table in tables:
+            if not table.records:
+                continue
+            if table.records[0].values.get("result") == "current":
+                if current_price is None:
+                    for record in table.records:
+                        value = record.get_value()
+                        if value is not None:
+                            current_price = float(value)
+                            break
+            else:
+                forecast_tables.append(table)
+
+        size = sum(len(table.records) for table in forecast_tables)
+        times = np.empty(size, dtype=np.float64)
+        values = np.empty(size, dtype=np.float64)
+        n = 0
+        for table in forecast_tables:
             for record in table.records:
                 ts = record.get_time()
                 value = record.get_value()
                 if ts is None or value is None:
                     continue
-                prices_by_time[ts] = float(value)
-        return sorted(prices_by_time.values())
-
-    @staticmethod
-    def _percentile(values: list[float], q: float) -> float:
-        if not values:
-            raise ValueError("values cannot be empty")
-        if len(values) == 1:
-            return values[0]
-        idx = (len(values) - 1) * q
-        lo = int(idx)
-        hi = min(lo + 1, len(values) - 1)
-        frac = idx - lo
-        return values[lo] + (values[hi] - values[lo]) * frac
+                times[n] = ts.timestamp()
+                values[n] = value
+                n += 1
+        # Deduplicate on timestamp, keeping the last value seen for each one
+        times, values = times[:n][::-1], values[:n][::-1]
+        _, idx = np.unique(times, return_index=True)
+        return current_price, values[idx]
@@ -0,0 +1,24 @@
+import asyncio
+from typing import Awaitable, Callable
+
+Ticker = Callable[[], Awaitable[None]]
+
+
+async def periodic(interval: float, *tickers: Ticker):
+    """
+    Run all tickers concurrently every `interval` seconds on one timer.
+
+    Ticks are scheduled at a fixed rate (start + n * interval), so the time a
+    tick takes doesn't push later ticks back. If a tick overruns, the
+    schedule restarts from now instead of firing a burst of catch-up ticks.
+    Tickers are expected to handle their own errors.
+    """
+    loop = asyncio.get_running_loop()
+    next_t = loop.time()
+    while True:
+        await asyncio.gather(*(tick() for tick in tickers))
+        next_t += interval
+        now = loop.time()
+        if next_t < now:
+            next_t = now
+        await asyncio.sleep(next_t - now)
@@ -1,63 +1,115 @@
 import asyncio
 import logging
 import os
+import signal
 import sys
+import threading
+import time
 from pathlib import Path
+import orjson
 import structlog
-from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
-from config import load_settings
-from loops import DecisionLoop, ActuationLoop
-from collectors import TibberCollector
+from logutil import LEVEL
 
-log_level = os.getenv("EMS_LOG_LEVEL", "INFO").upper()
-logging.basicConfig(level=getattr(logging, log_level, logging.INFO))
+try:
+    import uvloop
+except ImportError:  # e.g. Windows dev machines — fall back to the stock loop
+    uvloop = None
+
+logging.basicConfig(level=LEVEL)
+
+
+# JSON lines go straight from orjson (bytes) to stderr, skipping both the
+# decode to str and the stdlib logging handler. stdlib logging stays
+# configured above for third-party libraries.
+if LEVEL == logging.DEBUG:
+    RENDERERS = [structlog.dev.ConsoleRenderer()]
+    LOGGER_FACTORY = structlog.PrintLoggerFactory(file=sys.stderr)
+else:
+    RENDERERS = [
+        # Nothing else turns log.exception()'s exc_info into a traceback
+        structlog.processors.format_exc_info,
+        structlog.processors.JSONRenderer(serializer=orjson.dumps),
+    ]
+    LOGGER_FACTORY = structlog.BytesLoggerFactory(file=sys.stderr.buffer)
 
 structlog.configure(
     processors=[
         structlog.contextvars.merge_contextvars,
         structlog.processors.add_log_level,
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.dev.ConsoleRenderer() if log_level == "DEBUG" else structlog.processors.JSONRenderer(),
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+        *RENDERERS,
     ],
-    wrapper_class=structlog.stdlib.BoundLogger,
-    logger_factory=structlog.stdlib.LoggerFactory(),
+    # Drops calls below LEVEL before any processor runs
+    wrapper_class=structlog.make_filtering_bound_logger(LEVEL),
+    logger_factory=LOGGER_FACTORY,
+    # Module-level loggers bind once instead of re-resolving config per call
+    cache_logger_on_first_use=True,
 )
 log = structlog.get_logger()
 HEARTBEAT_PATH = Path("/var/log/ems/heartbeat")
+try:
+    HEARTBEAT_PATH.parent.mkdir(parents=True, exist_ok=True)
+except OSError:
+    pass  # e.g. not writable on a dev machine; os.open in main() reports it
+
+_STATUS_BODY = b'{"status":"ok"}'
+STATUS_OK = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Content-Length: " + str(len(_STATUS_BODY)).encode("ascii") + b"\r\n"
+    b"Connection: close\r\n\r\n" + _STATUS_BODY
+)
+NOT_FOUND = (
+    b"HTTP/1.1 404 Not Found\r\n"
+    b"Content-Length: 0\r\n"
+    b"Connection: close\r\n\r\n"
+)
 
 
-async def heartbeat():
-    HEARTBEAT_PATH.parent.mkdir(parents=True, exist_ok=True)
+HEARTBEAT_INTERVAL_SEC = 30
+# The loop must answer a ping within this window for the heartbeat to
+# advance; the Dockerfile HEALTHCHECK flags the container after 120s.
+HEARTBEAT_STALE_SEC = 2 * HEARTBEAT_INTERVAL_SEC
+
+
+def _heartbeat_thread(fd: int, stop: threading.Event, loop: asyncio.AbstractEventLoop):
+    # Runs on its own OS thread so a slow filesystem can never stall the
+    # event loop; utime on an already-open fd is a single syscall. The file
+    # is only touched while the loop keeps answering the round-trip below,
+    # so a blocked or wedged loop still turns the container unhealthy.
+    utime = os.utime
+    wait = stop.wait
+    monotonic = time.monotonic
+    last_seen = monotonic()
+
+    def _mark():  # runs on the event loop
+        nonlocal last_seen
+        last_seen = monotonic()
+
     while True:
-        HEARTBEAT_PATH.touch()
-        await asyncio.sleep(30)
+        if monotonic() - last_seen < HEARTBEAT_STALE_SEC:
+            utime(fd, None)
+        else:
+            log.warning("ems.heartbeat_stale", loop_silent_sec=round(monotonic() - last_seen))
+        try:
+            loop.call_soon_threadsafe(_mark)
+        except RuntimeError:  # loop already closed
+            return
+        if wait(HEARTBEAT_INTERVAL_SEC):
+            return
 
 
 async def status_server():
     async def _handle(reader, writer):
-        body = b'{"status":"ok"}'
         try:
             request_line = await reader.readline()
-            parts = request_line.decode("utf-8", errors="ignore").strip().split(" ")
-            path = parts[1] if len(parts) >= 2 else "/"
+            parts = request_line.split()
+            path = parts[1] if len(parts) >= 2 else b"/"
             while True:
                 line = await reader.readline()
                 if not line or line in (b"\r\n", b"\n"):
                     break
-            if path == "/status":
-                response = (
-                    b"HTTP/1.1 200 OK\r\n"
-                    b"Content-Type: application/json\r\n"
-                    b"Content-Length: " + str(len(body)).encode("ascii") + b"\r\n"
-                    b"Connection: close\r\n\r\n" + body
-                )
-            else:
-                response = (
-                    b"HTTP/1.1 404 Not Found\r\n"
-                    b"Content-Length: 0\r\n"
-                    b"Connection: close\r\n\r\n"
-                )
-            writer.write(response)
+            writer.write(STATUS_OK if path == b"/status" else NOT_FOUND)
             await writer.drain()
         finally:
             writer.close()
@@ -69,49 +121,168 @@ async def status_server():
         await server.serve_forever()
 
 
-async def main():
+async def supervise(name: str, factory, backoff: float = 1.0, max_backoff: float = 60.0):
+    """Run factory() and restart it with exponential backoff whenever it crashes."""
+    loop = asyncio.get_running_loop()
+    delay = backoff
+    while True:
+        started = loop.time()
+        try:
+            await factory()
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if loop.time() - started > max_backoff:
+                # Ran healthy for a while: this is a fresh crash, not a crash loop
+                delay = backoff
+            log.exception("ems.loop_crashed", loop=name, restart_in_sec=delay)
+            await asyncio.sleep(delay)
+            delay = min(max_backoff, delay * 2)
+
+
+async def _ping_with_retry(influx, attempts: int = 3, base: float = 1.0, timeout: float = 5.0) -> bool:
+    """Ping InfluxDB with a per-attempt timeout and exponential backoff between attempts."""
+    for attempt in range(attempts):
+        try:
+            if await asyncio.wait_for(influx.ping(), timeout=timeout):
+                return True
+            reason = "not_ready"
+        except asyncio.TimeoutError:
+            reason = "timeout"
+        except Exception as e:  # e.g. connection refused while InfluxDB starts
+            reason = type(e).__name__
+        if attempt + 1 < attempts:
+            delay = base * 2 ** attempt
+            log.warning("ems.influx_ping_failed", attempt=attempt + 1, reason=reason, retry_in_sec=delay)
+            await asyncio.sleep(delay)
+        else:
+            log.warning("ems.influx_ping_failed", attempt=attempt + 1, reason=reason)
+    return False
+
+
+async def main() -> int:
+    """Set up config and InfluxDB, run the service; returns the process exit code."""
     log.info("ems.starting", version="0.1.0")
+    # asyncio debug mode follows EMS_LOG_LEVEL; PYTHONASYNCIODEBUG is
+    # overridden so a leftover env var never costs production throughput.
+    loop = asyncio.get_running_loop()
+    loop.set_debug(LEVEL == logging.DEBUG)
+    loop.slow_callback_duration = 0.5
+    # Heavy imports (influxdb_client pulls in aiohttp/rx, numpy, pydantic) are
+    # deferred until logging is configured and the loop is running.
+    from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+    from config import load_settings
+
     try:
-        settings = load_settings()
+        # Test-mode overrides requested by user.
+        settings = load_settings(overrides={"ems": {"decision_interval_sec": 60, "dry_run": True}})
     except Exception as e:
         log.error("ems.config_error", error=str(e))
-        sys.exit(1)
-    # Test-mode overrides requested by user.
-    settings.ems.decision_interval_sec = 60
-    settings.ems.dry_run = True
+        return 1
     log.info(
         "ems.config_loaded",
         dry_run=settings.ems.dry_run,
         decision_interval=settings.ems.decision_interval_sec,
         influx_url=settings.influx.url,
     )
-    influx = InfluxDBClientAsync(url=settings.influx.url, token=settings.influx.token, org=settings.influx.org)
-    ready = await influx.ping()
-    if not ready:
-        log.error("ems.influx_not_ready")
-        sys.exit(1)
-    log.info("ems.influx_connected")
-    decision = DecisionLoop(settings, influx)
-    decision.interval = 60
+    # A single client (one aiohttp session) serves both the WriteBuffer and
+    # DecisionLoop; cap its pool so they reuse a few keep-alive sockets
+    # instead of the default cpu_count() * 5.
+    influx = InfluxDBClientAsync(
+        url=settings.influx.url,
+        token=settings.influx.token,
+        org=settings.influx.org,
+        connection_pool_maxsize=8,
+    )
+    try:
+        ready = await _ping_with_retry(influx)
+        if not ready:
+            log.error("ems.influx_not_ready")
+            return 1
+        log.info("ems.influx_connected")
+        return await _run(settings, influx)
+    finally:
+        # Runs on every exit path, so the aiohttp session never leaks sockets
+        await influx.close()
+        log.info("ems.stopped")
+
+
+async def _run(settings, influx) -> int:
+    import httpx
+    from loops import DecisionLoop, ActuationLoop
+    from collectors import TibberCollector
+    from price_cache import PriceCache
+    from writer import WriteBuffer
+
+    # Open the heartbeat first: it is the one setup step expected to fail
+    # (e.g. /var/log/ems not writable), and nothing needs cleaning up yet.
+    try:
+        hb_fd = os.open(HEARTBEAT_PATH, os.O_CREAT | os.O_WRONLY | os.O_CLOEXEC, 0o644)
+    except OSError as e:
+        log.error("ems.heartbeat_unavailable", path=str(HEARTBEAT_PATH), error=str(e))
+        return 1
+
+    prices = PriceCache()
+    decision = DecisionLoop(settings, influx, cache=prices)
     actuation = ActuationLoop(settings, influx, decision)
-    tibber = TibberCollector(settings, influx)
+    buffer = WriteBuffer(influx, settings)
+    # One pooled HTTP/2 client for all collectors keeps TLS sessions alive between ticks
+    http = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(10.0, connect=3.0),
+        limits=httpx.Limits(max_keepalive_connections=4, max_connections=8, keepalive_expiry=600),
+    )
+    tibber = TibberCollector(settings, influx, buffer, http, cache=prices)
+
+    loop = asyncio.get_running_loop()
+    hb_stop = threading.Event()
+    hb_thread = threading.Thread(
+        target=_heartbeat_thread, args=(hb_fd, hb_stop, loop), name="heartbeat", daemon=True
+    )
+
+    # Turn SIGTERM (docker stop) and SIGINT into a cancellation of main(), so
+    # the TaskGroup unwinds and the cleanup below always runs.
+    main_task = asyncio.current_task()
 
-    log.info("ems.loops_starting")
+    def _request_shutdown(sig: signal.Signals):
+        log.info("ems.signal_received", signal=sig.name)
+        main_task.cancel()
+
+    rc = 0
     try:
-        await asyncio.gather(
-            heartbeat(),
-            status_server(),
-            # Control loops
-            decision.run_forever(),
-            actuation.run_forever(),
-            # Data collectors
-            tibber.run_forever(),
-        )
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, _request_shutdown, sig)
+        log.info("ems.loops_starting")
+        hb_thread.start()
+        await buffer.start()
+        try:
+            async with asyncio.TaskGroup() as tg:
+                # Each task restarts on its own, so one crash (e.g. an Influx 5xx)
+                # doesn't cancel the others
+                tg.create_task(supervise("status_server", status_server), name="status_server")
+                # Control loops
+                tg.create_task(supervise("decision", decision.run_forever), name="decision")
+                tg.create_task(supervise("actuation", actuation.run_forever), name="actuation")
+                # Data collectors
+                tg.create_task(supervise("tibber", tibber.run_forever), name="tibber")
+        except* Exception as eg:
+            # Any failed task has already cancelled its siblings
+            for exc in eg.exceptions:
+                log.error("ems.task_failed", error=repr(exc))
+            rc = 1
     except asyncio.CancelledError:
         log.info("ems.shutdown")
     finally:
-        await influx.close()
-        log.info("ems.stopped")
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
+        await buffer.drain()
+        await http.aclose()
+        hb_stop.set()
+        if hb_thread.is_alive():
+            hb_thread.join(timeout=5)
+        os.close(hb_fd)
+    return rc
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(asyncio.run(main(), loop_factory=uvloop.new_event_loop if uvloop else None))
@@ -0,0 +1,28 @@
+import time
+import numpy as np
+
+
+class PriceCache:
+    """
+    Latest Tibber prices, shared in memory between TibberCollector and DecisionLoop.
+
+    TibberCollector refreshes it on every successful poll; DecisionLoop reads
+    it instead of querying InfluxDB while it is fresh.
+    """
+
+    def __init__(self):
+        self.current: float | None = None
+        self.today: np.ndarray = np.empty(0)
+        self.updated_at = 0.0  # time.monotonic() of the last refresh
+
+    def update(self, current: float | None, today: np.ndarray):
+        self.current = current
+        self.today = today
+        self.updated_at = time.monotonic()
+
+    def touch(self):
+        """Mark the cached prices as confirmed unchanged."""
+        self.updated_at = time.monotonic()
+
+    def is_fresh(self, max_age_sec: float) -> bool:
+        return self.updated_at > 0 and time.monotonic() - self.updated_at < max_age_sec
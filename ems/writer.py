@@ -0,0 +1,165 @@
+import asyncio
+import random
+import aiohttp
+import structlog
+from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+from influxdb_client.domain.write_precision import WritePrecision
+from influxdb_client.rest import ApiException
+
+log = structlog.get_logger()
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Connection trouble and 429/5xx responses; other rejections (400, 401, 404) are permanent."""
+    if isinstance(exc, ApiException):
+        return exc.status is not None and exc.status >= 429
+    return isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+class _FailedBatch:
+    """Records from one failed flush, retried on their own schedule."""
+
+    def __init__(self, batch: dict[str, list], due: float):
+        self.batch = batch
+        self.due = due  # loop.time() of the next attempt
+        self.retries = 0
+
+    @property
+    def points(self) -> int:
+        return sum(map(len, self.batch.values()))
+
+
+class WriteBuffer:
+    """
+    Shared write queue for all collectors.
+
+    Collectors enqueue (bucket, records) and a single background task flushes
+    them to InfluxDB, one HTTP request per bucket, every `batch_size` records
+    or `flush_interval` (+ random jitter) seconds — whichever comes first.
+    A batch that failed with a connection error or a 429/5xx is retried
+    after `retry_interval`, up to `max_retries` times, separately from newer
+    records; any other rejection is dropped at once. Defaults come from the
+    INFLUX_WRITE_* settings.
+    """
+
+    def __init__(self, influx_client: InfluxDBClientAsync, settings):
+        self.influx = influx_client
+        self.settings = settings
+        cfg = settings.influx
+        self.batch_size = cfg.write_batch_size
+        self.flush_interval = cfg.write_flush_interval_ms / 1000
+        self.jitter_interval = cfg.write_jitter_interval_ms / 1000
+        self.retry_interval = cfg.write_retry_interval_ms / 1000
+        self.max_retries = cfg.write_max_retries
+        self._failed: list[_FailedBatch] = []
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._write_api = influx_client.write_api()
+        self._task: asyncio.Task | None = None
+        self._pending: dict[str, list] = {}
+        self._pending_count = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._flusher(), name="write_buffer")
+        log.info("write_buffer.start", batch_size=self.batch_size, flush_interval=self.flush_interval)
+
+    async def put(self, item: tuple[str, list]):
+        await self._queue.put(item)
+
+    async def drain(self):
+        """Stop the flusher and write whatever is still queued."""
+        if self._task is not None:
+            # A sentinel rather than cancel(): the flusher finishes its current
+            # write and flushes everything queued before it, then exits.
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                self._add(*item)
+        failed = await self._flush(self._take())
+        if failed:
+            log.error("write_buffer.dropped", points=sum(map(len, failed.values())), retries=0)
+
+    def _add(self, bucket: str, records: list):
+        self._pending.setdefault(bucket, []).extend(records)
+        self._pending_count += len(records)
+
+    def _take(self) -> dict[str, list]:
+        batch, self._pending, self._pending_count = self._pending, {}, 0
+        return batch
+
+    async def _flusher(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            deadline = loop.time() + self.flush_interval + random.uniform(0, self.jitter_interval)
+            if self._failed:
+                deadline = min(deadline, min(f.due for f in self._failed))
+            while self._pending_count < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:  # drain() sentinel
+                    stopping = True
+                    break
+                self._add(*item)
+            if self._pending:
+                failed = await self._flush(self._take())
+                if failed:
+                    self._failed.append(_FailedBatch(failed, loop.time() + self.retry_interval))
+            if self._failed:
+                # On shutdown every failed batch gets one last attempt now
+                await self._retry_failed(loop, final=stopping)
+
+    async def _retry_failed(self, loop: asyncio.AbstractEventLoop, final: bool):
+        still_failed = []
+        for entry in self._failed:
+            if not final and entry.due > loop.time():
+                still_failed.append(entry)
+                continue
+            if entry.retries < self.max_retries:
+                entry.batch = await self._flush(entry.batch)
+                if not entry.batch:
+                    continue
+                entry.retries += 1
+            if final or entry.retries >= self.max_retries:
+                log.error("write_buffer.dropped", points=entry.points, retries=entry.retries)
+                continue
+            entry.due = loop.time() + self.retry_interval
+            still_failed.append(entry)
+        self._failed = still_failed
+
+    async def _flush(self, batch: dict[str, list]) -> dict[str, list]:
+        """Write each bucket's records; return the ones that failed but may be retried."""
+        failed: dict[str, list] = {}
+        for bucket, records in batch.items():
+            if not records:
+                continue
+            try:
+                await self._write_api.write(
+                    bucket=bucket,
+                    org=self.settings.influx.org,
+                    record=records,
+                    write_precision=WritePrecision.NS,
+                )
+            except Exception as e:
+                if _is_retryable(e):
+                    log.warning(
+                        "write_buffer.error",
+                        bucket=bucket,
+                        points=len(records),
+                        error=str(e) or repr(e),
+                        retryable=True,
+                    )
+                    failed[bucket] = records
+                else:
+                    log.exception("write_buffer.error", bucket=bucket, points=len(records), retryable=False)
+                    log.error("write_buffer.dropped", bucket=bucket, points=len(records), retries=0)
+                continue
+            log.info("write_buffer.flush", bucket=bucket, points=len(records))
+        return failed